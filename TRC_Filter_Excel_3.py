@@ -1,423 +1,763 @@
+"""
+TRC Filter Excel v3.1 - Updated for Cleaned Log Files
+Processes TRC log files and exports to Excel format.
+Now compatible with cleaned log files (removes \\N entries).
+
+Use with cleaned log files from trc_log_cleaner.py for best results.
+Use --format csv/tsv to skip Excel and write one delimited file per sheet.
+Use --cache-dir to reuse parse results of files seen in earlier runs.
+Use --timeline to also build per-character session timelines (trc_timeline.py).
+Use --watchlist to only report rows involving a list of suspect characters.
+Use --price-anomalies to add a ranked sheet of unusually priced AH/shop sales.
+
+Can also be imported from other Python code; nothing runs at import time:
+
+    import TRC_Filter_Excel_3 as trc
+    report = trc.create_report('week34', 'csv')
+    trc.write_report(trc.parse_events('WorldSvr_01_01_250828.GameLog'), report)
+"""
+
+import os
 import sys
+import csv
+import errno
+import logging
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 
-#FOR EXCEL VERSION YOU NEED INSTALL THIS LIBRARY. "pip install XlsxWriter"
-import xlsxwriter
-
 #FOR MULTIPLE ARGUMENTS "pip install argparse"
 import argparse
 
-"""
-TRC Filter Excel v3.1 - Updated for Cleaned Log Files
-Processes TRC log files and exports to Excel format.
-Now compatible with cleaned log files (removes \\N entries).
+from trc_parse_cache import CacheEntryError, ParseCache, remove_file
 
-Use with cleaned log files from trc_log_cleaner.py for best results.
-"""
+#Progress and warnings of library code; main() prints them to the console.
+logger = logging.getLogger(__name__)
 
 #SET THROWLOG ON(1) / OFF(0)
 enablethrowlog = '1'
 
+#CSV/TSV OUTPUT: ROWS BUFFERED PER SHEET BEFORE EACH writerows() CALL
+csv_batch_rows = 10000
+
+#BUMP WHEN iter_events() OUTPUT CHANGES, SO OLD --cache-dir ENTRIES ARE NOT REUSED
+parser_version = '6'
+
 #FOR DEBUG ONLY
 #sys.argv = ['./logfilter_2.py', 'in.trc']
 
-parser = argparse.ArgumentParser(description='TRC Filter Excel v3.1 - Convert TRC logs to Excel format')
-parser.add_argument('file', type=argparse.FileType('rt'), nargs='*', help='TRC log files to process (drag & drop supported)')
+#Sheet layouts shared by every output format: (sheet name, headers, {column: width})
+SHEET_LAYOUTS = [
+    ('AuctionHouse_Log',
+     ['BuyerCharIdx', 'SellerCharIdx', 'ItemKind', 'ItemOpt', 'AlzPriceEach', 'Count', 'TotalPrice'],
+     {3: 12, 4: 15, 6: 15}),
+    ('PersonalShop_Log',
+     ['SellerCharIdx', 'BuyerCharIDX', 'ItemKind', 'ItemOpt', 'AlzPrice'],
+     {3: 12, 4: 15}),
+    ('Trade_Log',
+     ['TimeStamp', 'SrcCharIDX', 'DesCharIDX', 'ItemKind', 'ItemOpt', 'Alz'],
+     {0: 12, 4: 12, 5: 15}),
+    ('GuildWarehouse_Log',
+     ['GuildNo', 'CharIDX', 'In/Out', 'ItemKind', 'ItemOpt', 'Count', 'AlzAmount'],
+     {4: 12, 6: 12}),
+    ('Mail_Log',
+     ['TimeStamp', 'FromCharIDX', 'ToCharIDX', 'ItemKind', 'ItemOpt', 'AlzAmount', 'ReceivedMailID'],
+     {0: 12, 4: 12, 5: 15, 6: 12}),
+    ('Throw_Log',
+     ['CharacterIDX', 'ItemKind', 'ItemOpt', 'Throw/Pickup'],
+     {2: 15}),
+    ('No_Entry_Hack_Log',
+     ['TimeStamp', 'CharacterIdx', 'Action'],
+     {}),
+]
+
+#Extra sheet written with --price-anomalies, ranked by score
+ANOMALY_LAYOUT = ('Price_Anomaly_Log',
+                  ['Score', 'Direction', 'MarketPrice', 'Samples', 'Market', 'TimeStamp', 'SellerCharIdx',
+                   'BuyerCharIdx', 'ItemKind', 'ItemOpt', 'UnitPrice', 'Count'],
+                  {2: 15, 5: 18, 9: 12, 10: 15})
+
+#Report sheet of each event type
+EVENT_SHEETS = {
+    '51044': 'AuctionHouse_Log',
+    '5115': 'PersonalShop_Log',
+    '5131': 'Trade_Log',
+    '5203': 'Trade_Log',
+    '51049': 'GuildWarehouse_Log',
+    '10953': 'GuildWarehouse_Log',
+    '51019': 'Mail_Log',
+    '5361': 'Mail_Log',
+    '5101': 'Throw_Log',
+    '5102': 'Throw_Log',
+    '51022': 'No_Entry_Hack_Log',
+    '6167': 'No_Entry_Hack_Log',
+    '9': 'No_Entry_Hack_Log',
+    '9103': 'No_Entry_Hack_Log',
+}
+
+#Row columns holding character ids on each sheet
+PARTICIPANT_COLUMNS = {
+    'AuctionHouse_Log': (0, 1),
+    'PersonalShop_Log': (0, 1),
+    'Trade_Log': (1, 2),
+    'GuildWarehouse_Log': (1,),
+    'Mail_Log': (1, 2),
+    'Throw_Log': (0,),
+    'No_Entry_Hack_Log': (1,),
+}
+
+
+class ExcelReport:
+    """Report backend writing every sheet into a single .xlsx workbook."""
+
+    def __init__(self, output_base, layouts=SHEET_LAYOUTS):
+        #FOR EXCEL VERSION YOU NEED INSTALL THIS LIBRARY. "pip install XlsxWriter"
+        #Imported here so CSV/TSV runs and library use do not need it.
+        import xlsxwriter
+
+        self.filename = output_base + '.xlsx'
+        self.filenames = [self.filename]
+        self.workbook = xlsxwriter.Workbook(self.filename)
+        self.sheets = {}
+        self.counts = {}
+
+        #Creating the sheets, headers and line counters.
+        for name, headers, widths in layouts:
+            sheet = self.workbook.add_worksheet(name)
+            sheet.freeze_panes(1, 0)
+            for col, header in enumerate(headers):
+                sheet.write_string(0, col, header)
+            for col, width in widths.items():
+                sheet.set_column(col, col, width)
+            self.sheets[name] = sheet
+            self.counts[name] = 0
+
+    def write(self, sheet_name, row):
+        sheet = self.sheets[sheet_name]
+        row_num = self.counts[sheet_name] + 1
+        for col, value in enumerate(row):
+            sheet.write_string(row_num, col, value)
+        self.counts[sheet_name] = row_num
+
+    def close(self):
+        self.workbook.close()
+
+
+class DelimitedReport:
+    """Report backend writing one CSV/TSV file per sheet.
+
+    Rows are buffered per sheet and handed to csv.writer.writerows() in
+    batches of csv_batch_rows, so writing a row costs one list append.
+    """
+
+    def __init__(self, output_base, delimiter=',', layouts=SHEET_LAYOUTS):
+        extension = '.tsv' if delimiter == '\t' else '.csv'
+        self.filenames = []
+        self.files = {}
+        self.writers = {}
+        self.pending = {}
+        self.counts = {}
+
+        for name, headers, _widths in layouts:
+            filename = f"{output_base}.{name}{extension}"
+            handle = open(filename, 'w', newline='', encoding='utf-8', buffering=1 << 20)
+            writer = csv.writer(handle, delimiter=delimiter)
+            writer.writerow(headers)
+            self.filenames.append(filename)
+            self.files[name] = handle
+            self.writers[name] = writer
+            self.pending[name] = []
+            self.counts[name] = 0
+
+    def write(self, sheet_name, row):
+        pending = self.pending[sheet_name]
+        pending.append(row)
+        if len(pending) >= csv_batch_rows:
+            self.flush(sheet_name)
+
+    def flush(self, sheet_name):
+        pending = self.pending[sheet_name]
+        self.counts[sheet_name] += len(pending)
+        self.writers[sheet_name].writerows(pending)
+        pending.clear()
+
+    def close(self):
+        for name in self.pending:
+            self.flush(name)
+            self.files[name].close()
 
-args = parser.parse_args()
 
-# Check if any files were provided
-if not args.file:
-    print("TRC Filter Excel v3.1 - Drag & Drop Support")
-    print("=" * 55)
-    print("Convert TRC log files to organized Excel spreadsheets.")
-    print()
-    print("Usage:")
-    print("  python TRC_Filter_Excel_3.py <log_file(s)>")
-    print()
-    print("Features:")
-    print("  • Drag and drop multiple files")
-    print("  • Automatic Excel report generation")
-    print("  • Multiple log types supported")
-    print("  • Clean, organized spreadsheet format")
-    print()
-    print("Supported log types:")
-    print("  • Trade logs (5131, 5203)")
-    print("  • Personal shop logs (5115)")
-    print("  • Auction house logs (51044)")
-    print("  • Guild warehouse logs (51049, 10953)")
-    print("  • Mail logs (51019, 5361)")
-    print("  • Connection logs (9, 9103)")
-    print("  • Dungeon logs (51022, 6167)")
-    print()
-    print("Example:")
-    print("  python TRC_Filter_Excel_3.py WorldSvr_01_01_250828.GameLog")
-    print("  python TRC_Filter_Excel_3.py file1.log file2.log file3.log")
-    print()
-    print("💡 Tip: Use trc_log_cleaner.py first to remove \\N entries!")
-    print("   Drag cleaned files onto this script for best results.")
-    sys.exit(1)
-
-# Create Excel filename based on first file (for multiple files, combine them)
-if len(args.file) == 1:
-    # Handle different file object types
-    first_file = args.file[0]
-    if hasattr(first_file, 'name'):
-        first_filename = first_file.name
-    else:
-        first_filename = str(first_file)
-    excel_filename = first_filename + '.xlsx'
-else:
-    # For multiple files, use a combined name
-    first_file = args.file[0]
-    if hasattr(first_file, 'name'):
-        base_name = Path(first_file.name).stem
-    else:
-        base_name = Path(str(first_file)).stem
-    excel_filename = f"{base_name}_combined.xlsx"
-
-print(f"TRC Filter Excel v3.1")
-print(f"Processing {len(args.file)} file(s)...")
-print(f"Output: {excel_filename}")
-print()
-
-#Creating the xls file.
-workbook = xlsxwriter.Workbook(excel_filename)
-
-#Creating the sheets
-xls_ahlog = workbook.add_worksheet('AuctionHouse_Log')
-xls_pslog = workbook.add_worksheet('PersonalShop_Log')
-xls_tradelog = workbook.add_worksheet('Trade_Log')
-xls_gwhlog = workbook.add_worksheet('GuildWarehouse_Log')
-xls_maillog = workbook.add_worksheet('Mail_Log')
-xls_throwlog = workbook.add_worksheet('Throw_Log')
-xls_entrylog = workbook.add_worksheet('No_Entry_Hack_Log')
-
-#Creating the sheet headers and line counters.   
-#PS_Log Headers
-xls_pslog.freeze_panes(1, 0)
-xls_pslog.write_string(0, 0, 'SellerCharIdx')
-xls_pslog.write_string(0, 1, 'BuyerCharIDX')
-xls_pslog.write_string(0, 2, 'ItemKind')
-xls_pslog.write_string(0, 3, 'ItemOpt')
-xls_pslog.set_column(3, 3, 12)
-xls_pslog.write_string(0, 4, 'AlzPrice')
-xls_pslog.set_column(4, 4, 15)
-xls_pslog_counter = 1
-
-#Trade_Log Headers
-xls_tradelog.freeze_panes(1, 0)
-xls_tradelog.write_string(0, 0, 'TimeStamp')
-xls_tradelog.set_column(0, 0, 12)
-xls_tradelog.write_string(0, 1, 'SrcCharIDX')
-xls_tradelog.write_string(0, 2, 'DesCharIDX')
-xls_tradelog.write_string(0, 3, 'ItemKind')
-xls_tradelog.write_string(0, 4, 'ItemOpt')
-xls_tradelog.set_column(4, 4, 12)
-xls_tradelog.write_string(0, 5, 'Alz')
-xls_tradelog.set_column(5, 5, 15)
-xls_tradelog_counter = 1
-
-#AH_Log Headers
-xls_ahlog.freeze_panes(1, 0)
-xls_ahlog.write_string(0, 0, 'BuyerCharIdx')
-xls_ahlog.write_string(0, 1, 'SellerCharIdx')
-xls_ahlog.write_string(0, 2, 'ItemKind')
-xls_ahlog.write_string(0, 3, 'ItemOpt')
-xls_ahlog.set_column(3, 3, 12)
-xls_ahlog.write_string(0, 4, 'AlzPriceEach')
-xls_ahlog.set_column(4, 4, 15)
-xls_ahlog.write_string(0, 5, 'Count')
-xls_ahlog.write_string(0, 6, 'TotalPrice')
-xls_ahlog.set_column(6, 6, 15)
-xls_ahlog_counter = 1
-
-#GWH_Log Headers
-xls_gwhlog.freeze_panes(1, 0)
-xls_gwhlog.write_string(0, 0, 'GuildNo')
-xls_gwhlog.write_string(0, 1, 'CharIDX')
-xls_gwhlog.write_string(0, 2, 'In/Out')
-xls_gwhlog.write_string(0, 3, 'ItemKind')
-xls_gwhlog.write_string(0, 4, 'ItemOpt')
-xls_gwhlog.set_column(4, 4, 12)
-xls_gwhlog.write_string(0, 5, 'Count')
-xls_gwhlog.write_string(0, 6, 'AlzAmount')
-xls_gwhlog.set_column(6, 6, 12)
-xls_gwhlog_counter = 1
-
-#Mail_Log Headers
-xls_maillog.freeze_panes(1, 0)
-xls_maillog.write_string(0, 0, 'TimeStamp')
-xls_maillog.set_column(0, 0, 12)
-xls_maillog.write_string(0, 1, 'FromCharIDX')
-xls_maillog.write_string(0, 2, 'ToCharIDX')
-xls_maillog.write_string(0, 3, 'ItemKind')
-xls_maillog.write_string(0, 4, 'ItemOpt')
-xls_maillog.set_column(4, 4, 12)
-xls_maillog.write_string(0, 5, 'AlzAmount')
-xls_maillog.set_column(5, 5, 15)
-xls_maillog.write_string(0, 6, 'ReceivedMailID')
-xls_maillog.set_column(6, 6, 12)
-xls_maillog_counter = 1
-
-#Throw_Log Headers
-xls_throwlog.freeze_panes(1, 0)
-xls_throwlog.write_string(0, 0, 'CharacterIDX')
-xls_throwlog.write_string(0, 1, 'ItemKind')
-xls_throwlog.write_string(0, 2, 'ItemOpt')
-xls_throwlog.set_column(2, 2, 15)
-xls_throwlog.write_string(0, 3, 'Throw/Pickup')
-xls_throwlog_counter = 1
-
-#No_Entry_Hack_Log Headers
-xls_entrylog.freeze_panes(1, 0)
-xls_entrylog.write_string(0, 0, 'TimeStamp')
-xls_entrylog.write_string(0, 1, 'CharacterIdx')
-xls_entrylog.write_string(0, 2, 'Action')
-xls_entrylog_counter = 1
-
-args = parser.parse_args()
-dataLog = []
-for f in args.file:
-    try:
-        for line_num, line in enumerate(f, 1):
+REPORT_FORMATS = {
+    'xlsx': lambda output_base, layouts: ExcelReport(output_base, layouts),
+    'csv': lambda output_base, layouts: DelimitedReport(output_base, ',', layouts),
+    'tsv': lambda output_base, layouts: DelimitedReport(output_base, '\t', layouts),
+}
+
+
+def create_report(output_base, report_format='xlsx', price_anomalies=False):
+    """Create an ExcelReport or DelimitedReport, optionally with the Price_Anomaly_Log sheet."""
+    layouts = SHEET_LAYOUTS + [ANOMALY_LAYOUT] if price_anomalies else SHEET_LAYOUTS
+    return REPORT_FORMATS[report_format](output_base, layouts)
+
+
+@lru_cache(maxsize=4096)
+def format_timestamp(value):
+    #Consecutive log lines mostly share a timestamp, so cache the formatted text.
+    return datetime.fromtimestamp(int(value)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class Quarantine:
+    """Collects malformed log lines in a file instead of printing them.
+
+    A quarantine file left by an earlier run is removed at start. The file
+    is only created when the first bad line arrives, and lines are counted
+    per event type for the run summary.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = None
+        self.counts = {}
+        self.total = 0
+        #Files fully parsed or loaded with this quarantine, so a second pass does not repeat their lines
+        self.checked = set()
+        remove_file(path)
+
+    def add(self, source, line_num, event_id, reason, line):
+        if self.handle is None:
+            self.handle = open(self.path, 'w', encoding='utf-8', buffering=1 << 20)
+        self.handle.write(f"{source}:{line_num}\t{event_id}\t{reason}\t{line}\n")
+        self.counts[event_id] = self.counts.get(event_id, 0) + 1
+        self.total += 1
+
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+
+
+#Row builders per event type. Each runs only after the line passed the
+#EVENT_RULES checks below, so field access and int() cannot fail.
+def personal_shop_row(fields):
+    return [fields[3], fields[10], fields[4], fields[8], fields[11]]
+
+
+def trade_item_row(fields):
+    return [format_timestamp(fields[0]),
+            fields[3],   # SrcCharIDX
+            fields[10],  # DesCharIDX
+            fields[4],   # ItemKind
+            fields[8],   # ItemOpt
+            '-']         # Alz
+
+
+def trade_alz_row(fields):
+    return [format_timestamp(fields[0]), fields[3], fields[7], '-', '-', fields[5]]
+
+
+def auction_house_row(fields):
+    totalprice = str(int(fields[11]) * int(fields[12]))
+    return [fields[10], fields[3], fields[6], fields[7], fields[11], fields[12], totalprice]
+
+
+def guild_warehouse_item_row(fields):
+    inout = 'In' if fields[11] == '0' else 'Out'
+    return [fields[5], fields[6], inout, fields[4], fields[8], fields[13], '-']
+
+
+def guild_warehouse_alz_row(fields):
+    inout = 'In' if fields[7] == '0' else 'Out'
+    return [fields[4], fields[3], inout, '-', '-', '-', fields[9]]
+
+
+def mail_item_row(fields):
+    return [format_timestamp(fields[0]), fields[3], fields[12], fields[4], fields[8], '-', fields[13]]
+
+
+def mail_alz_row(fields):
+    return [format_timestamp(fields[0]), fields[3], fields[8], '-', '-', fields[5], fields[9]]
+
+
+def throw_row(fields):
+    return [fields[3], fields[8], fields[9], 'Throw']
+
+
+def pickup_row(fields):
+    # Different field positions for 5101 vs 5102
+    return [fields[3], fields[9], fields[10], 'Pickup']
+
+
+def dungeon_entry_row(fields):
+    action = "Dungeon entry used: " + fields[4] + "-" + fields[9] + ". Slot: " + fields[12] + " Dungeon: " + fields[6] + "."
+    return [format_timestamp(fields[0]), fields[3], action]
+
+
+def dungeon_start_row(fields):
+    return [format_timestamp(fields[0]), fields[3], "Dungeon: " + fields[4] + " started."]
+
+
+def disconnect_row(fields):
+    return [format_timestamp(fields[0]), "-", "Disconnect from IP: " + fields[2] + "."]
+
+
+def channel_entry_row(fields):
+    return [format_timestamp(fields[0]), fields[3], "Characteridx: " + fields[3] + " entered the channel."]
+
+
+#Per event type: (minimum field count, fields that must be numeric, row builder).
+#Checked once per line in iter_events(); failing lines go to the quarantine.
+EVENT_RULES = {
+    '5115': (12, (0,), personal_shop_row),              #Personal Shop Logger
+    '5131': (11, (0,), trade_item_row),                 #Trade Item Logger
+    '5203': (8, (0,), trade_alz_row),                   #Trade Alz Logger
+    '51044': (13, (0, 11, 12), auction_house_row),      #Auction House Logger
+    '51049': (14, (0,), guild_warehouse_item_row),      #Guild Warehouse Item Logger
+    '10953': (10, (0,), guild_warehouse_alz_row),       #Guild Warehouse Alz Logger
+    '51019': (14, (0,), mail_item_row),                 #Mail Item Logger
+    '5361': (10, (0,), mail_alz_row),                   #Mail Alz Logger
+    '5101': (11, (0,), throw_row),                      #Throw Logger
+    '5102': (11, (0,), pickup_row),                     #Pickup Logger
+    '51022': (13, (0,), dungeon_entry_row),             #Dungeon entry logger
+    '6167': (5, (0,), dungeon_start_row),               #Dungeon start logger
+    '9': (3, (0,), disconnect_row),                     #Connection logs
+    '9103': (4, (0,), channel_entry_row),
+}
+
+
+def iter_events(f, quarantine=None):
+    """Yield (event id, timestamp, address, row) for every supported event in an open log file.
+
+    The report sheet of an event is EVENT_SHEETS[event id]; timestamp and
+    address are the raw first and third fields of the log line. Lines of a
+    supported event type that are too short or have non-numeric fields are
+    passed to quarantine (a Quarantine) instead, or dropped if it is None.
+    """
+    source = getattr(f, 'name', '?')
+    for line_num, line in enumerate(f, 1):
+        line = line.strip()
+        splittedline = line.split("|")
+
+        # Skip empty lines and lines without an event type field
+        if len(splittedline) < 2:
+            continue
+
+        rule = EVENT_RULES.get(splittedline[1])
+        if rule is None:
+            continue
+        event_id = splittedline[1]
+
+        #Throw/Pickup Logger
+        #THIS TAKE TONS OF TIME To RUN, ENABLE IT IF REALLY NEEDED!
+        if enablethrowlog != '1' and (event_id == '5101' or event_id == '5102'):
+            continue
+
+        min_fields, numeric_fields, build_row = rule
+        if len(splittedline) < min_fields:
+            if quarantine is not None:
+                quarantine.add(source, line_num, event_id,
+                               f"expected {min_fields} fields, got {len(splittedline)}", line)
+            continue
+        for index in numeric_fields:
+            if not splittedline[index].isdigit():
+                if quarantine is not None:
+                    quarantine.add(source, line_num, event_id, f"field {index} is not numeric", line)
+                break
+        else:
             try:
-                line = line.replace("\n","").strip()
-                if not line:  # Skip empty lines
-                    continue
+                #Any consumer may format the timestamp, so check it for every event type here
+                format_timestamp(splittedline[0])
+                row = build_row(splittedline)
+            except (ValueError, OverflowError, OSError) as e:
+                #Timestamps out of the platform's datetime range
+                if quarantine is not None:
+                    quarantine.add(source, line_num, event_id, str(e), line)
+                continue
+            yield event_id, splittedline[0], splittedline[2], row
 
-                splittedline = line.split("|")
 
-                # Skip lines that don't have enough fields
-                if len(splittedline) < 2:
-                    continue
+class QuarantinedLines:
+    """Quarantine stand-in keeping a file's malformed lines as [None, line number, event id, reason, line]."""
+
+    def __init__(self):
+        self.lines = []
+
+    def add(self, source, line_num, event_id, reason, line):
+        self.lines.append([None, line_num, event_id, reason, line])
+
+
+def iter_records(f):
+    """Yield the events and malformed line records (see QuarantinedLines) of an open log file in line order."""
+    bad_lines = QuarantinedLines()
+    for event in iter_events(f, bad_lines):
+        if bad_lines.lines:
+            yield from bad_lines.lines
+            bad_lines.lines.clear()
+        yield event
+    yield from bad_lines.lines
 
-                # Skip lines where the second field (event type) is empty
-                if not splittedline[1].strip():
-                    continue
 
-                #Personal Shop Logger
-                if len(splittedline) >= 12 and splittedline[1] == '5115':
-                    try:
-                        xls_pslog.write_string(xls_pslog_counter, 0, splittedline[3])
-                        xls_pslog.write_string(xls_pslog_counter, 1, splittedline[10])
-                        xls_pslog.write_string(xls_pslog_counter, 2, splittedline[4])
-                        xls_pslog.write_string(xls_pslog_counter, 3, splittedline[8])
-                        xls_pslog.write_string(xls_pslog_counter, 4, splittedline[11])
-                        xls_pslog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 5115 entry: {e}")
-                        continue
-
-                #Trade Item Logger
-                if len(splittedline) >= 11 and splittedline[1] == '5131':
-                    try:
-                        xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[3])  # SrcCharIDX
-                        xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[10])  # DesCharIDX
-                        xls_tradelog.write_string(xls_tradelog_counter, 3, splittedline[4])  # ItemKind
-                        xls_tradelog.write_string(xls_tradelog_counter, 4, splittedline[8])  # ItemOpt
-                        xls_tradelog.write_string(xls_tradelog_counter, 5, '-')              # Alz
-                        xls_tradelog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 5131 entry: {e}")
-                        continue
-
-                #Trade Alz Logger
-                if len(splittedline) >= 8 and splittedline[1] == '5203':
-                    try:
-                        xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[3])
-                        xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[7])
-                        xls_tradelog.write_string(xls_tradelog_counter, 3, '-')
-                        xls_tradelog.write_string(xls_tradelog_counter, 4, '-')
-                        xls_tradelog.write_string(xls_tradelog_counter, 5, splittedline[5])
-                        xls_tradelog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 5203 entry: {e}")
-                        continue
-
-                #Auction House Logger
-                if len(splittedline) >= 13 and splittedline[1] == '51044':
-                    try:
-                        totalprice = str(int(splittedline[11]) * int(splittedline[12]))
-                        xls_ahlog.write_string(xls_ahlog_counter, 0, splittedline[10])
-                        xls_ahlog.write_string(xls_ahlog_counter, 1, splittedline[3]) #
-                        xls_ahlog.write_string(xls_ahlog_counter, 2, splittedline[6])
-                        xls_ahlog.write_string(xls_ahlog_counter, 3, splittedline[7])
-                        xls_ahlog.write_string(xls_ahlog_counter, 4, splittedline[11])
-                        xls_ahlog.write_string(xls_ahlog_counter, 5, splittedline[12])
-                        xls_ahlog.write_string(xls_ahlog_counter, 6, totalprice)
-                        xls_ahlog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 51044 entry: {e}")
-                        continue
-                #Guild Warehouse Item Logger
-                if len(splittedline) >= 14 and splittedline[1] == '51049':
-                    try:
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[5])
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[6])
-                        if splittedline[11] == '0':
-                            xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
-                        else:
-                            xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 3, splittedline[4])
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 4, splittedline[8])
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 5, splittedline[13])
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 6, '-')
-                        xls_gwhlog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 51049 entry: {e}")
-                        continue
-
-                #Guild Warehouse Alz Logger
-                if len(splittedline) >= 10 and splittedline[1] == '10953':
-                    try:
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[4])
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[3])
-                        if splittedline[7] == '0':
-                            xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
-                        else:
-                            xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 3, '-')
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 4, '-')
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 5, '-')
-                        xls_gwhlog.write_string(xls_gwhlog_counter, 6, splittedline[9])
-                        xls_gwhlog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 10953 entry: {e}")
-                        continue
-
-                #Mail Item Logger
-                if len(splittedline) >= 14 and splittedline[1] == '51019':
-                    try:
-                        xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_maillog.write_string(xls_maillog_counter, 1, splittedline[3])
-                        xls_maillog.write_string(xls_maillog_counter, 2, splittedline[12])
-                        xls_maillog.write_string(xls_maillog_counter, 3, splittedline[4])
-                        xls_maillog.write_string(xls_maillog_counter, 4, splittedline[8])
-                        xls_maillog.write_string(xls_maillog_counter, 5, '-')
-                        xls_maillog.write_string(xls_maillog_counter, 6, splittedline[13])
-                        xls_maillog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 51019 entry: {e}")
-                        continue
-
-                #Mail Alz Logger
-                if len(splittedline) >= 10 and splittedline[1] == '5361':
-                    try:
-                        xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_maillog.write_string(xls_maillog_counter, 1, splittedline[3])
-                        xls_maillog.write_string(xls_maillog_counter, 2, splittedline[8])
-                        xls_maillog.write_string(xls_maillog_counter, 3, '-')
-                        xls_maillog.write_string(xls_maillog_counter, 4, '-')
-                        xls_maillog.write_string(xls_maillog_counter, 5, splittedline[5])
-                        xls_maillog.write_string(xls_maillog_counter, 6, splittedline[9])
-                        xls_maillog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 5361 entry: {e}")
-                        continue
-
-                #Throw/Pickup Logger
-                #THIS TAKE TONS OF TIME To RUN, ENABLE IT IF REALLY NEEDED!
-                if enablethrowlog == '1':
-                    if len(splittedline) >= 11 and (splittedline[1] == '5101' or splittedline[1] == '5102'):
-                        try:
-                            xls_throwlog.write_string(xls_throwlog_counter, 0, splittedline[3])  # CharacterIDX
-
-                            # Different field positions for 5101 vs 5102
-                            if splittedline[1] == '5101':
-                                xls_throwlog.write_string(xls_throwlog_counter, 1, splittedline[8])   # ItemKind
-                                xls_throwlog.write_string(xls_throwlog_counter, 2, splittedline[9])   # ItemOpt
-                            elif splittedline[1] == '5102':
-                                xls_throwlog.write_string(xls_throwlog_counter, 1, splittedline[9])   # ItemKind
-                                xls_throwlog.write_string(xls_throwlog_counter, 2, splittedline[10])  # ItemOpt
-
-                            if splittedline[1] == '5101':
-                                xls_throwlog.write_string(xls_throwlog_counter, 3, 'Throw')
-                            elif splittedline[1] == '5102':
-                                xls_throwlog.write_string(xls_throwlog_counter, 3, 'Pickup')
-                            xls_throwlog_counter += 1
-                        except (IndexError, ValueError) as e:
-                            print(f"Warning: Skipping malformed 5101/5102 entry: {e}")
-                            continue
-
-                #Dungeon entry logger
-                if len(splittedline) >= 12 and splittedline[1] == '51022':
-                    try:
-                        xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[3])
-                        action = "Dungeon entry used: " + splittedline[4] + "-" + splittedline[9] + ". Slot: " + splittedline[12] + " Dungeon: " + splittedline[6] + "."
-                        xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-                        xls_entrylog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 51022 entry: {e}")
-                        continue
-
-                #Dungeon start logger
-                if len(splittedline) >= 4 and splittedline[1] == '6167':
-                    try:
-                        xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[3])
-                        action = "Dungeon: " + splittedline[4] + " started."
-                        xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-                        xls_entrylog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 6167 entry: {e}")
-                        continue
-
-                #Connection logs
-                if len(splittedline) >= 3 and splittedline[1] == '9':
-                    try:
-                        xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_entrylog.write_string(xls_entrylog_counter, 1, "-")
-                        action = "Disconnect from IP: " + splittedline[2] + "."
-                        xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-                        xls_entrylog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 9 entry: {e}")
-                        continue
-
-                if len(splittedline) >= 4 and splittedline[1] == '9103':
-                    try:
-                        xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-                        xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[3])
-                        action = "Characteridx: " + splittedline[3] + " entered the channel."
-                        xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-                        xls_entrylog_counter += 1
-                    except (IndexError, ValueError) as e:
-                        print(f"Warning: Skipping malformed 9103 entry: {e}")
-                        continue
-
-            except Exception as e:
-                print(f"Warning: Error processing line {line_num}: {e}")
+def read_events(f, cache=None, quarantine=None):
+    """Yield (sheet name, event) for an open log file, from the parse cache when possible.
+
+    Events and malformed lines of a fully parsed file are stored in the
+    cache in line order for later runs. Malformed lines go to quarantine
+    the first time a file is read in a run, whether it is parsed or loaded
+    from the cache. A cache entry found corrupt halfway is deleted and the
+    file parsed again, continuing after the records already replayed.
+    """
+    if quarantine is not None and f.name in quarantine.checked:
+        quarantine = None
+
+    cache_key = cache.key_for(f.name) if cache else None
+    replayed = 0
+    if cache_key:
+        cached = cache.load(cache_key)
+        if cached is not None:
+            _meta, cached_records = cached
+            logger.info(f"Using cached rows for {f.name}")
+            try:
+                for record in cached_records:
+                    if record[0] is None:
+                        if quarantine is not None:
+                            quarantine.add(f.name, *record[1:])
+                    else:
+                        event_id, timestamp, address, row = record
+                        yield EVENT_SHEETS[event_id], (event_id, timestamp, address, row)
+                    replayed += 1
+            except CacheEntryError as e:
+                logger.warning(f"Warning: {e}; parsing {f.name} again")
+            else:
+                if quarantine is not None:
+                    quarantine.checked.add(f.name)
+                return
+
+    #Cache this file's records block by block in line order; the entry is only kept once it parsed completely.
+    #Replaying them in the same order keeps order-dependent results (price anomalies) identical.
+    writer = cache.writer(cache_key) if cache_key else None
+    try:
+        for index, record in enumerate(iter_records(f)):
+            if writer is not None:
+                writer.add(record)
+            #Records already replayed from a cache entry that turned out corrupt
+            if index < replayed:
                 continue
+            if record[0] is None:
+                if quarantine is not None:
+                    quarantine.add(f.name, *record[1:])
+            else:
+                yield EVENT_SHEETS[record[0]], record
+        if quarantine is not None:
+            quarantine.checked.add(f.name)
+        if writer is not None:
+            writer.commit()
+            writer = None
+    finally:
+        if writer is not None:
+            writer.discard()
+
+
+def parse_events(path, cache=None, quarantine=None):
+    """Yield (sheet name, event) for a log file path.
+
+    The file is opened only while it is being read, so any number of paths
+    can be processed without holding a file handle per path.
+    """
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        yield from read_events(f, cache, quarantine)
+
+
+def load_watchlist(path):
+    """Read CharIDX values (one or more per line, '#' starts a comment) into a set."""
+    watchlist = set()
+    with open(path, 'r', encoding='utf-8', errors='ignore') as infile:
+        for line in infile:
+            watchlist.update(line.split('#', 1)[0].replace(',', ' ').split())
+    return watchlist
+
+
+def involves(sheet_name, row, characters):
+    """True if any character id column of the row is in characters."""
+    for col in PARTICIPANT_COLUMNS[sheet_name]:
+        if row[col] in characters:
+            return True
+    return False
+
+
+def expand_watchlist(paths, watchlist, cache=None, quarantine=None, on_error=None):
+    """Add every first-degree counterparty of the watchlist, in one extra pass over the files.
+
+    on_error is passed on to iter_files_events().
+    """
+    counterparties = set()
+    for sheet_name, (_event_id, _timestamp, _address, row) in iter_files_events(paths, cache, quarantine, on_error):
+        if involves(sheet_name, row, watchlist):
+            for col in PARTICIPANT_COLUMNS[sheet_name]:
+                counterparties.add(row[col])
+    counterparties.discard('-')
+    return watchlist | counterparties
+
+
+def score_sale(scorer, event_id, timestamp, row):
+    """Feed an auction house (51044) or personal shop (5115) sale to the price anomaly scorer."""
+    try:
+        if event_id == '51044':
+            market, buyer, seller, count = 'AuctionHouse', row[0], row[1], row[5]
+        else:
+            market, seller, buyer, count = 'PersonalShop', row[0], row[1], '-'
+        unit_price = int(row[4])
+        timestamp = format_timestamp(timestamp)
+    except (ValueError, OverflowError, OSError):
+        return
+    scorer.add((row[2], row[3]), unit_price, [market, timestamp, seller, buyer, row[2], row[3], row[4], count])
+
+
+def default_output_base(paths):
+    """Output name for a report: the log file name, or '<first stem>_combined' for several files."""
+    if len(paths) == 1:
+        return str(paths[0])
+    return f"{Path(str(paths[0])).stem}_combined"
+
+
+def write_report(events, report, watchlist=None, timeline=None, scorer=None):
+    """Write (sheet name, event) pairs to a report backend, then close it.
+
+    The optional timeline (TimelineBuilder) and scorer (PriceAnomalyScorer)
+    see every event; with a watchlist (set of CharIDX) only rows involving
+    one of those characters are written, plus the next disconnect (9) from
+    the address of each watched channel entry (9103). Returns the row count
+    per sheet.
+    The report and timeline are closed even if reading the events fails.
+    """
+    #Addresses with a watched character online, since disconnect rows carry no CharacterIdx
+    watched_addresses = set()
+    try:
+        for sheet_name, (event_id, timestamp, address, row) in events:
+            if timeline:
+                timeline.add(sheet_name, event_id, timestamp, address, row)
+            if scorer and (event_id == '51044' or event_id == '5115'):
+                score_sale(scorer, event_id, timestamp, row)
+            if watchlist is not None and not involves(sheet_name, row, watchlist):
+                if event_id != '9' or address not in watched_addresses:
+                    continue
+                watched_addresses.discard(address)
+            elif watchlist is not None and event_id == '9103':
+                watched_addresses.add(address)
+            report.write(sheet_name, row)
+
+        #Price anomalies are ranked once every sale has been scored.
+        if scorer:
+            for row in scorer.rows():
+                report.write('Price_Anomaly_Log', row)
+    finally:
+        #Closing the report files.
+        try:
+            report.close()
+        finally:
+            if timeline:
+                timeline.close()
+    return report.counts
+
+
+def export_file(path, report_format='xlsx'):
+    """Write the report of a single log file next to it.
+
+    Returns (list of report files, malformed line count, quarantine file).
+    Malformed lines are written to '<log file>.quarantine.log'. Raises
+    FileNotFoundError before any report file is created if path does not exist.
+    """
+    if not os.path.isfile(path):
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), path)
+    output_base = default_output_base([path])
+    report = create_report(output_base, report_format)
+    quarantine = Quarantine(output_base + '.quarantine.log')
+    try:
+        write_report(parse_events(path, quarantine=quarantine), report)
+    finally:
+        quarantine.close()
+    return report.filenames, quarantine.total, quarantine.path
+
+
+def iter_files_events(paths, cache=None, quarantine=None, on_error=None):
+    """Chain parse_events() over several files.
+
+    With on_error, a file that fails is passed to on_error(path, exception)
+    and the next file is read; without it the exception is raised.
+    """
+    for path in paths:
+        try:
+            yield from parse_events(path, cache, quarantine)
+        except Exception as e:
+            if on_error is None:
+                raise
+            on_error(path, e)
+
+
+def report_file_error(path, error):
+    print(f"Error processing file {path}: {error}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='TRC Filter Excel v3.1 - Convert TRC logs to Excel format')
+    parser.add_argument('file', nargs='*', help='TRC log files to process (drag & drop supported)')
+    parser.add_argument('--format', choices=sorted(REPORT_FORMATS), default='xlsx',
+                        help='Output format: one Excel workbook (default) or one CSV/TSV file per sheet')
+    parser.add_argument('--cache-dir', help='Directory caching parsed rows per log file, reused by later runs')
+    parser.add_argument('--cache-max-mb', type=int, default=2048, help='Disk budget of --cache-dir in MB (default: 2048)')
+    parser.add_argument('--watchlist', help='Only report rows involving a CharIDX listed in this file (one per line), '
+                                            'plus disconnects from the address a listed character entered on')
+    parser.add_argument('--watchlist-expand', action='store_true',
+                        help='Also report rows of first-degree counterparties of the watchlist (extra pass, use with --cache-dir)')
+    parser.add_argument('--price-anomalies', action='store_true',
+                        help='Add a Price_Anomaly_Log sheet ranking AH/personal shop sales far from the item market price')
+    parser.add_argument('--anomaly-top', type=int, default=1000, help='Rows kept in Price_Anomaly_Log (default: 1000)')
+    parser.add_argument('--anomaly-min-score', type=float, default=3.0,
+                        help='Lowest score listed in Price_Anomaly_Log (default: 3.0)')
+    parser.add_argument('--timeline', action='store_true',
+                        help='Also write an indexed per-character session timeline database (<output>.timeline.db)')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s', stream=sys.stdout)
+    if args.anomaly_top < 1:
+        parser.error("--anomaly-top must be at least 1")
+    if args.anomaly_min_score < 0:
+        parser.error("--anomaly-min-score must not be negative")
+
+    # Check if any files were provided
+    if not args.file:
+        print("TRC Filter Excel v3.1 - Drag & Drop Support")
+        print("=" * 55)
+        print("Convert TRC log files to organized Excel spreadsheets.")
+        print()
+        print("Usage:")
+        print("  python TRC_Filter_Excel_3.py <log_file(s)>")
+        print("  python TRC_Filter_Excel_3.py --format csv <log_file(s)>")
+        print("  python TRC_Filter_Excel_3.py --cache-dir <dir> <log_file(s)>")
+        print("  python TRC_Filter_Excel_3.py --timeline <log_file(s)>")
+        print("  python TRC_Filter_Excel_3.py --watchlist suspects.txt <log_file(s)>")
+        print("  python TRC_Filter_Excel_3.py --price-anomalies <log_file(s)>")
+        print()
+        print("Features:")
+        print("  • Drag and drop multiple files")
+        print("  • Automatic Excel report generation")
+        print("  • CSV/TSV output for automated pipelines (--format csv|tsv)")
+        print("  • Parse cache for files already seen in earlier runs (--cache-dir)")
+        print("  • Per-character login sessions and activity timelines (--timeline)")
+        print("  • Watchlist mode: only rows involving suspect characters (--watchlist)")
+        print("  • Ranked AH/shop price anomalies (--price-anomalies)")
+        print("  • Multiple log types supported")
+        print("  • Clean, organized spreadsheet format")
+        print()
+        print("Supported log types:")
+        print("  • Trade logs (5131, 5203)")
+        print("  • Personal shop logs (5115)")
+        print("  • Auction house logs (51044)")
+        print("  • Guild warehouse logs (51049, 10953)")
+        print("  • Mail logs (51019, 5361)")
+        print("  • Connection logs (9, 9103)")
+        print("  • Dungeon logs (51022, 6167)")
+        print()
+        print("Example:")
+        print("  python TRC_Filter_Excel_3.py WorldSvr_01_01_250828.GameLog")
+        print("  python TRC_Filter_Excel_3.py file1.log file2.log file3.log")
+        print()
+        print("💡 Tip: Use trc_log_cleaner.py first to remove \\N entries!")
+        print("   Drag cleaned files onto this script for best results.")
+        sys.exit(1)
+
+    # Files are opened one at a time while parsing, so only check they exist here
+    for path in args.file:
+        if not os.path.isfile(path):
+            parser.error(f"can't open '{path}': file not found")
+
+    # Create output name based on first file (for multiple files, combine them)
+    output_base = default_output_base(args.file)
+
+    #Creating the report (xls workbook or csv/tsv files).
+    report = create_report(output_base, args.format, args.price_anomalies)
+
+    scorer = None
+    if args.price_anomalies:
+        from trc_price_stats import PriceAnomalyScorer
+        scorer = PriceAnomalyScorer(top_n=args.anomaly_top, min_score=args.anomaly_min_score)
+
+    #Cached rows depend on the parser and on the throw log setting.
+    cache = None
+    if args.cache_dir:
+        cache = ParseCache(args.cache_dir, args.cache_max_mb * 1024 * 1024,
+                           variant=f"-p{parser_version}t{enablethrowlog}")
+
+    timeline = None
+    if args.timeline:
+        from trc_timeline import TimelineBuilder
+        timeline = TimelineBuilder(output_base + '.timeline.db', PARTICIPANT_COLUMNS)
+
+    #Malformed lines are written here instead of to the console.
+    quarantine = Quarantine(output_base + '.quarantine.log')
+
+    print(f"TRC Filter Excel v3.1")
+    print(f"Processing {len(args.file)} file(s)...")
+    for filename in report.filenames:
+        print(f"Output: {filename}")
+    print()
+
+    #Watchlist mode only writes rows where a participant column matches.
+    watchlist = None
+    if args.watchlist:
+        watchlist = load_watchlist(args.watchlist)
+        print(f"Watchlist: {len(watchlist)} character(s)")
+        if args.watchlist_expand:
+            watchlist = expand_watchlist(args.file, watchlist, cache, quarantine, report_file_error)
+            print(f"Watchlist with counterparties: {len(watchlist)} character(s)")
+        print()
+
+    counts = write_report(iter_files_events(args.file, cache, quarantine, report_file_error),
+                          report, watchlist, timeline, scorer)
+    quarantine.close()
+    if cache:
+        cache.close()
+
+    print()
+    print("=" * 50)
+    print("✅ Report Generated Successfully!")
+    if len(report.filenames) == 1:
+        print(f"📁 Output file: {report.filenames[0]}")
+    else:
+        print("📁 Output files:")
+        for filename in report.filenames:
+            print(f"   • {filename}")
+    print()
+    print("📊 Summary of processed data:")
+    print(f"   • Trade Logs: {counts['Trade_Log']} entries")
+    print(f"   • Personal Shop Logs: {counts['PersonalShop_Log']} entries")
+    print(f"   • Auction House Logs: {counts['AuctionHouse_Log']} entries")
+    print(f"   • Guild Warehouse Logs: {counts['GuildWarehouse_Log']} entries")
+    print(f"   • Mail Logs: {counts['Mail_Log']} entries")
+    print(f"   • Throw/Pickup Logs: {counts['Throw_Log']} entries")
+    print(f"   • Entry/Connection Logs: {counts['No_Entry_Hack_Log']} entries")
+    if scorer:
+        print(f"   • Price Anomalies: {counts['Price_Anomaly_Log']} with score >= {scorer.min_score:g} "
+              f"of {scorer.scored} scored sales")
+    if cache:
+        print(f"   • Parse cache: {cache.hits} file(s) reused, {cache.misses} file(s) parsed")
+    if timeline:
+        print(f"   • Timeline: {timeline.session_count} sessions, {timeline.event_count} character events "
+              f"in {timeline.db_path}")
+        print(f"     Look up a character with: python trc_timeline.py \"{timeline.db_path}\" <CharIDX>")
+    if quarantine.total:
+        per_event = ", ".join(f"{event_id}: {count}" for event_id, count in sorted(quarantine.counts.items()))
+        print(f"   • ⚠️ Malformed lines skipped: {quarantine.total} ({per_event})")
+        print(f"     Written to: {quarantine.path}")
+    print()
+    print("🎯 Next Steps:")
+    if args.format == 'xlsx':
+        print("   • Open the Excel file to view organized data")
+        print("   • Use filters and sorting for analysis")
+        print("   • Each sheet contains different log types")
+    else:
+        print(f"   • Load the {args.format.upper()} files into a spreadsheet, database or script")
+        print("   • Each file contains one log type")
+    print()
+    print("💡 Tip: Drag more log files onto this script anytime!")
+
 
-    except Exception as e:
-        print(f"Error processing file {f}: {e}")
-        continue
-
-#Closing the Excel file.
-workbook.close()
-
-print()
-print("=" * 50)
-print("✅ Excel Report Generated Successfully!")
-print(f"📁 Output file: {excel_filename}")
-print()
-print("📊 Summary of processed data:")
-print(f"   • Trade Logs: {xls_tradelog_counter - 1} entries")
-print(f"   • Personal Shop Logs: {xls_pslog_counter - 1} entries")
-print(f"   • Auction House Logs: {xls_ahlog_counter - 1} entries")
-print(f"   • Guild Warehouse Logs: {xls_gwhlog_counter - 1} entries")
-print(f"   • Mail Logs: {xls_maillog_counter - 1} entries")
-print(f"   • Throw/Pickup Logs: {xls_throwlog_counter - 1} entries")
-print(f"   • Entry/Connection Logs: {xls_entrylog_counter - 1} entries")
-print()
-print("🎯 Next Steps:")
-print("   • Open the Excel file to view organized data")
-print("   • Use filters and sorting for analysis")
-print("   • Each sheet contains different log types")
-print()
-print("💡 Tip: Drag more log files onto this script anytime!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
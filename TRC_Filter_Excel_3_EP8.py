@@ -1,3 +1,4 @@
+import os
 import sys
 from datetime import datetime
 
@@ -10,6 +11,11 @@ import argparse
 #SET THROWLOG ON(1) / OFF(0)
 enablethrowlog = '0'
 
+#MINIMUM FIELD COUNT PER EVENT TYPE (EP8 FIELD POSITIONS). SHORTER OR NON-NUMERIC
+#LINES ARE WRITTEN TO <first file>.quarantine.log INSTEAD OF STOPPING THE RUN.
+eventfields = {'5115': 8, '5131': 7, '5203': 6, '51044': 10, '51049': 10, '10953': 7, '51019': 10,
+               '5361': 8, '5101': 5, '5102': 5, '51022': 9, '6167': 4, '9': 3, '9103': 3}
+
 #FOR DEBUG ONLY
 #sys.argv = ['./logfilter_2.py', 'in.trc']
 
@@ -113,157 +119,198 @@ xls_entrylog_counter = 1
 
 args = parser.parse_args()
 dataLog = []
-for f in args.file:
-    for line in f:
-        line = line.replace("\n","")
-        splittedline = line.split("|")
-
-        #Personal Shop Logger
-        if splittedline[1] == '5115':
-            xls_pslog.write_string(xls_pslog_counter, 0, splittedline[2])
-            xls_pslog.write_string(xls_pslog_counter, 1, splittedline[6])
-            xls_pslog.write_string(xls_pslog_counter, 2, splittedline[3])
-            xls_pslog.write_string(xls_pslog_counter, 3, splittedline[4])
-            xls_pslog.write_string(xls_pslog_counter, 4, splittedline[7])
-            xls_pslog_counter += 1
-
-        #Trade Item Logger
-        if splittedline[1] == '5131':
-            xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[2])
-            xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[6])
-            xls_tradelog.write_string(xls_tradelog_counter, 3, splittedline[3])
-            xls_tradelog.write_string(xls_tradelog_counter, 4, splittedline[4])
-            xls_tradelog.write_string(xls_tradelog_counter, 5, '-')
-            xls_tradelog_counter += 1
-
-        #Trade Alz Logger
-        if splittedline[1] == '5203':
-            xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[2])
-            xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[5])
-            xls_tradelog.write_string(xls_tradelog_counter, 3, '-')
-            xls_tradelog.write_string(xls_tradelog_counter, 4, '-')
-            xls_tradelog.write_string(xls_tradelog_counter, 5, splittedline[3])
-            xls_tradelog_counter += 1
-
-        #Auction House Logger
-        if splittedline[1] == '51044':
-            totalprice = str(int(splittedline[8]) * int(splittedline[9]))
-            xls_ahlog.write_string(xls_ahlog_counter, 0, splittedline[2])
-            xls_ahlog.write_string(xls_ahlog_counter, 1, splittedline[7])
-            xls_ahlog.write_string(xls_ahlog_counter, 2, splittedline[3])
-            xls_ahlog.write_string(xls_ahlog_counter, 3, splittedline[4])
-            xls_ahlog.write_string(xls_ahlog_counter, 4, splittedline[8])
-            xls_ahlog.write_string(xls_ahlog_counter, 5, splittedline[9])
-            xls_ahlog.write_string(xls_ahlog_counter, 6, totalprice)
-            xls_ahlog_counter += 1
-        
-        #Guild Warehouse Item Logger
-        if splittedline[1] == '51049':
-            xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[6])
-            xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[2])
-            if splittedline[7] == '0':
-                xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
-            else:
-                xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
-            xls_gwhlog.write_string(xls_gwhlog_counter, 3, splittedline[3])
-            xls_gwhlog.write_string(xls_gwhlog_counter, 4, splittedline[4])
-            xls_gwhlog.write_string(xls_gwhlog_counter, 5, splittedline[9])
-            xls_gwhlog.write_string(xls_gwhlog_counter, 6, '-')
-            xls_gwhlog_counter += 1
-
-        #Guild Warehouse Alz Logger
-        if splittedline[1] == '10953':
-            xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[3])
-            xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[2])
-            if splittedline[4] == '0':
-                xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
+quarantinefile = None
+quarantine_counter = 0
+#Remove the quarantine file of an earlier run, so it only ever lists this run's lines
+if os.path.exists(sys.argv[1] + '.quarantine.log'):
+    os.remove(sys.argv[1] + '.quarantine.log')
+try:
+    for f in args.file:
+        for line_num, line in enumerate(f, 1):
+            line = line.replace("\n","")
+            splittedline = line.split("|")
+
+            #Skip lines without an event type and event types not logged below
+            if len(splittedline) < 2 or splittedline[1] not in eventfields:
+                continue
+
+            #Quarantine short lines, non-numeric timestamp/price fields and timestamps out of the platform's range
+            reason = None
+            if len(splittedline) < eventfields[splittedline[1]]:
+                reason = 'expected ' + str(eventfields[splittedline[1]]) + ' fields, got ' + str(len(splittedline))
+            elif not splittedline[0].isdigit():
+                reason = 'field 0 is not numeric'
+            elif splittedline[1] == '51044' and not (splittedline[8].isdigit() and splittedline[9].isdigit()):
+                reason = 'price fields are not numeric'
             else:
-                xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
-            xls_gwhlog.write_string(xls_gwhlog_counter, 3, '-')
-            xls_gwhlog.write_string(xls_gwhlog_counter, 4, '-')
-            xls_gwhlog.write_string(xls_gwhlog_counter, 5, '-')
-            xls_gwhlog.write_string(xls_gwhlog_counter, 6, splittedline[6])
-            xls_gwhlog_counter += 1
-
-        #Mail Item Logger
-        if splittedline[1] == '51019':
-            xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_maillog.write_string(xls_maillog_counter, 1, splittedline[2])
-            xls_maillog.write_string(xls_maillog_counter, 2, splittedline[8])
-            xls_maillog.write_string(xls_maillog_counter, 3, splittedline[3])
-            xls_maillog.write_string(xls_maillog_counter, 4, splittedline[4])
-            xls_maillog.write_string(xls_maillog_counter, 5, '-')
-            xls_maillog.write_string(xls_maillog_counter, 6, splittedline[9])
-            xls_maillog_counter += 1
-
-        #Mail Alz Logger
-        if splittedline[1] == '5361':
-            xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_maillog.write_string(xls_maillog_counter, 1, splittedline[2])
-            xls_maillog.write_string(xls_maillog_counter, 2, splittedline[6])
-            xls_maillog.write_string(xls_maillog_counter, 3, '-')
-            xls_maillog.write_string(xls_maillog_counter, 4, '-')
-            xls_maillog.write_string(xls_maillog_counter, 5, splittedline[3])
-            xls_maillog.write_string(xls_maillog_counter, 6, splittedline[7])
-            xls_maillog_counter += 1
-
-        #Throw/Pickup Logger
-        #THIS TAKE TONS OF TIME To RUN, ENABLE IT IF REALLY NEEDED!
-        if enablethrowlog == '1':
-            if splittedline[1] == '5101' or splittedline[1] == '5102':
-                xls_throwlog.write_string(xls_throwlog_counter, 0, splittedline[2])
-                xls_throwlog.write_string(xls_throwlog_counter, 1, splittedline[3])
-                xls_throwlog.write_string(xls_throwlog_counter, 2, splittedline[4])
-                if splittedline[1] == '5101':
-                    xls_throwlog.write_string(xls_throwlog_counter, 3, 'Throw')
-                elif splittedline[1] == '5102':
-                    xls_throwlog.write_string(xls_throwlog_counter, 3, 'Pickup')
-                xls_throwlog_counter += 1
-
-        #NoEntryHackDetector
-        # if splittedline[1] == '5104':
-        #     xls_entrylog.write_string(xls_entrylog_counter, 0, splittedline[0])
-        #     xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
-        #     action = "Move Item Id: " + splittedline[3] + " ItemOpt: " + splittedline[4] + " From: " + splittedline[6] + " slot."
-        #     xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-        #     xls_entrylog_counter += 1
-        #
-        # if splittedline[1] == '5105':
-        #     xls_entrylog.write_string(xls_entrylog_counter, 0, splittedline[0])
-        #     xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
-        #     action = "Move Item Id: " + splittedline[3] + " ItemOpt: " + splittedline[4] + " To: " + splittedline[6] + " slot."
-        #     xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-        #     xls_entrylog_counter += 1
-
-        if splittedline[1] == '51022':
-            xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
-            action = "Dungeon entry used: " + splittedline[3] + "-" + splittedline[4] + ". Slot: " + splittedline[7] + " Dungeon: " + splittedline[8] + "."
-            xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-            xls_entrylog_counter += 1
-
-        if splittedline[1] == '6167':
-            xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
-            action = "Dungeon: " + splittedline[3] + " started."
-            xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-            xls_entrylog_counter += 1
-
-        if splittedline[1] == '9':
-            xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_entrylog.write_string(xls_entrylog_counter, 1, "-")
-            action = "Disconnect from IP: " + splittedline[2] + "."
-            xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-            xls_entrylog_counter += 1
-
-        if splittedline[1] == '9103':
-            xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
-            xls_entrylog.write_string(xls_entrylog_counter, 1, "-")
-            action = "Characteridx: " + splittedline[2] + " entered the channel."
-            xls_entrylog.write_string(xls_entrylog_counter, 2, action)
-            xls_entrylog_counter += 1
+                #isdigit() also accepts characters such as '²' that int() rejects
+                try:
+                    datetime.fromtimestamp(int(splittedline[0]))
+                    if splittedline[1] == '51044':
+                        int(splittedline[8])
+                        int(splittedline[9])
+                except (ValueError, OverflowError, OSError) as e:
+                    reason = str(e)
+            if reason is not None:
+                if quarantinefile is None:
+                    quarantinefile = open(sys.argv[1] + '.quarantine.log', 'w', encoding='utf-8')
+                quarantinefile.write(f.name + ':' + str(line_num) + '\t' + splittedline[1] + '\t' + reason + '\t' + line + '\n')
+                quarantine_counter += 1
+                continue
+
+            #Personal Shop Logger
+            if splittedline[1] == '5115':
+                xls_pslog.write_string(xls_pslog_counter, 0, splittedline[2])
+                xls_pslog.write_string(xls_pslog_counter, 1, splittedline[6])
+                xls_pslog.write_string(xls_pslog_counter, 2, splittedline[3])
+                xls_pslog.write_string(xls_pslog_counter, 3, splittedline[4])
+                xls_pslog.write_string(xls_pslog_counter, 4, splittedline[7])
+                xls_pslog_counter += 1
+
+            #Trade Item Logger
+            if splittedline[1] == '5131':
+                xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[2])
+                xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[6])
+                xls_tradelog.write_string(xls_tradelog_counter, 3, splittedline[3])
+                xls_tradelog.write_string(xls_tradelog_counter, 4, splittedline[4])
+                xls_tradelog.write_string(xls_tradelog_counter, 5, '-')
+                xls_tradelog_counter += 1
+
+            #Trade Alz Logger
+            if splittedline[1] == '5203':
+                xls_tradelog.write_string(xls_tradelog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_tradelog.write_string(xls_tradelog_counter, 1, splittedline[2])
+                xls_tradelog.write_string(xls_tradelog_counter, 2, splittedline[5])
+                xls_tradelog.write_string(xls_tradelog_counter, 3, '-')
+                xls_tradelog.write_string(xls_tradelog_counter, 4, '-')
+                xls_tradelog.write_string(xls_tradelog_counter, 5, splittedline[3])
+                xls_tradelog_counter += 1
+
+            #Auction House Logger
+            if splittedline[1] == '51044':
+                totalprice = str(int(splittedline[8]) * int(splittedline[9]))
+                xls_ahlog.write_string(xls_ahlog_counter, 0, splittedline[2])
+                xls_ahlog.write_string(xls_ahlog_counter, 1, splittedline[7])
+                xls_ahlog.write_string(xls_ahlog_counter, 2, splittedline[3])
+                xls_ahlog.write_string(xls_ahlog_counter, 3, splittedline[4])
+                xls_ahlog.write_string(xls_ahlog_counter, 4, splittedline[8])
+                xls_ahlog.write_string(xls_ahlog_counter, 5, splittedline[9])
+                xls_ahlog.write_string(xls_ahlog_counter, 6, totalprice)
+                xls_ahlog_counter += 1
+        
+            #Guild Warehouse Item Logger
+            if splittedline[1] == '51049':
+                xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[6])
+                xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[2])
+                if splittedline[7] == '0':
+                    xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
+                else:
+                    xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
+                xls_gwhlog.write_string(xls_gwhlog_counter, 3, splittedline[3])
+                xls_gwhlog.write_string(xls_gwhlog_counter, 4, splittedline[4])
+                xls_gwhlog.write_string(xls_gwhlog_counter, 5, splittedline[9])
+                xls_gwhlog.write_string(xls_gwhlog_counter, 6, '-')
+                xls_gwhlog_counter += 1
+
+            #Guild Warehouse Alz Logger
+            if splittedline[1] == '10953':
+                xls_gwhlog.write_string(xls_gwhlog_counter, 0, splittedline[3])
+                xls_gwhlog.write_string(xls_gwhlog_counter, 1, splittedline[2])
+                if splittedline[4] == '0':
+                    xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'In')
+                else:
+                    xls_gwhlog.write_string(xls_gwhlog_counter, 2, 'Out')
+                xls_gwhlog.write_string(xls_gwhlog_counter, 3, '-')
+                xls_gwhlog.write_string(xls_gwhlog_counter, 4, '-')
+                xls_gwhlog.write_string(xls_gwhlog_counter, 5, '-')
+                xls_gwhlog.write_string(xls_gwhlog_counter, 6, splittedline[6])
+                xls_gwhlog_counter += 1
+
+            #Mail Item Logger
+            if splittedline[1] == '51019':
+                xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_maillog.write_string(xls_maillog_counter, 1, splittedline[2])
+                xls_maillog.write_string(xls_maillog_counter, 2, splittedline[8])
+                xls_maillog.write_string(xls_maillog_counter, 3, splittedline[3])
+                xls_maillog.write_string(xls_maillog_counter, 4, splittedline[4])
+                xls_maillog.write_string(xls_maillog_counter, 5, '-')
+                xls_maillog.write_string(xls_maillog_counter, 6, splittedline[9])
+                xls_maillog_counter += 1
+
+            #Mail Alz Logger
+            if splittedline[1] == '5361':
+                xls_maillog.write_string(xls_maillog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_maillog.write_string(xls_maillog_counter, 1, splittedline[2])
+                xls_maillog.write_string(xls_maillog_counter, 2, splittedline[6])
+                xls_maillog.write_string(xls_maillog_counter, 3, '-')
+                xls_maillog.write_string(xls_maillog_counter, 4, '-')
+                xls_maillog.write_string(xls_maillog_counter, 5, splittedline[3])
+                xls_maillog.write_string(xls_maillog_counter, 6, splittedline[7])
+                xls_maillog_counter += 1
+
+            #Throw/Pickup Logger
+            #THIS TAKE TONS OF TIME To RUN, ENABLE IT IF REALLY NEEDED!
+            if enablethrowlog == '1':
+                if splittedline[1] == '5101' or splittedline[1] == '5102':
+                    xls_throwlog.write_string(xls_throwlog_counter, 0, splittedline[2])
+                    xls_throwlog.write_string(xls_throwlog_counter, 1, splittedline[3])
+                    xls_throwlog.write_string(xls_throwlog_counter, 2, splittedline[4])
+                    if splittedline[1] == '5101':
+                        xls_throwlog.write_string(xls_throwlog_counter, 3, 'Throw')
+                    elif splittedline[1] == '5102':
+                        xls_throwlog.write_string(xls_throwlog_counter, 3, 'Pickup')
+                    xls_throwlog_counter += 1
+
+            #NoEntryHackDetector
+            # if splittedline[1] == '5104':
+            #     xls_entrylog.write_string(xls_entrylog_counter, 0, splittedline[0])
+            #     xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
+            #     action = "Move Item Id: " + splittedline[3] + " ItemOpt: " + splittedline[4] + " From: " + splittedline[6] + " slot."
+            #     xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+            #     xls_entrylog_counter += 1
+            #
+            # if splittedline[1] == '5105':
+            #     xls_entrylog.write_string(xls_entrylog_counter, 0, splittedline[0])
+            #     xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
+            #     action = "Move Item Id: " + splittedline[3] + " ItemOpt: " + splittedline[4] + " To: " + splittedline[6] + " slot."
+            #     xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+            #     xls_entrylog_counter += 1
+
+            if splittedline[1] == '51022':
+                xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
+                action = "Dungeon entry used: " + splittedline[3] + "-" + splittedline[4] + ". Slot: " + splittedline[7] + " Dungeon: " + splittedline[8] + "."
+                xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+                xls_entrylog_counter += 1
+
+            if splittedline[1] == '6167':
+                xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_entrylog.write_string(xls_entrylog_counter, 1, splittedline[2])
+                action = "Dungeon: " + splittedline[3] + " started."
+                xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+                xls_entrylog_counter += 1
+
+            if splittedline[1] == '9':
+                xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_entrylog.write_string(xls_entrylog_counter, 1, "-")
+                action = "Disconnect from IP: " + splittedline[2] + "."
+                xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+                xls_entrylog_counter += 1
+
+            if splittedline[1] == '9103':
+                xls_entrylog.write_string(xls_entrylog_counter, 0, datetime.fromtimestamp(int(splittedline[0])).strftime('%Y-%m-%d %H:%M:%S'))
+                xls_entrylog.write_string(xls_entrylog_counter, 1, "-")
+                action = "Characteridx: " + splittedline[2] + " entered the channel."
+                xls_entrylog.write_string(xls_entrylog_counter, 2, action)
+                xls_entrylog_counter += 1
+finally:
+    #Written even if a line still stops the run
+    if quarantinefile is not None:
+        quarantinefile.close()
 
 #Closing the Excel file.
-workbook.close()
\ No newline at end of file
+workbook.close()
+
+if quarantinefile is not None:
+    print('Skipped ' + str(quarantine_counter) + ' malformed line(s), see ' + sys.argv[1] + '.quarantine.log')
\ No newline at end of file
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+TRC Batch Runner - Clean and export many log files concurrently
+
+Schedules a clean job (trc_log_cleaner.py) and a filter job
+(TRC_Filter_Excel_3.py) for every dropped file. Up to --jobs jobs run at
+the same time in worker processes, so one file can be read from disk
+while another is being parsed. Progress for all files is shown on a
+single status line, and each job runs at most once per batch.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from trc_log_cleaner import clean_log_file
+from TRC_Filter_Excel_3 import export_file
+
+JOB_KINDS = ('clean', 'filter')
+
+
+class BatchRunner:
+    """
+    Runs clean and filter jobs with bounded concurrency
+
+    Jobs are keyed by (kind, absolute path). Submitting a job that is
+    already queued, running or finished returns the existing task instead
+    of starting it again.
+    """
+
+    def __init__(self, max_jobs, report_format='xlsx'):
+        """
+        Args:
+            max_jobs (int): Maximum number of jobs running at once
+            report_format (str): Report format of filter jobs
+        """
+        self.max_jobs = max_jobs
+        self.report_format = report_format
+        self.semaphore = None
+        self.executor = None
+        self.jobs = {}
+        self.failures = []
+        self.quarantined = []
+        self.total = {kind: 0 for kind in JOB_KINDS}
+        self.done = {kind: 0 for kind in JOB_KINDS}
+        self.running = 0
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.started = time.monotonic()
+
+    def submit(self, kind, path):
+        """
+        Schedule a job unless the same job was already submitted
+
+        Args:
+            kind (str): 'clean' or 'filter'
+            path (str): Input log file of the job
+
+        Returns:
+            asyncio.Task: Task resolving to the job's output (cleaned file path, or
+            list of report files for a filter job), or None on failure
+        """
+        key = (kind, os.path.abspath(path))
+        task = self.jobs.get(key)
+        if task is None:
+            size = os.path.getsize(path) if os.path.isfile(path) else 0
+            task = asyncio.ensure_future(self.run_job(kind, key[1], size))
+            self.jobs[key] = task
+            self.total[kind] += 1
+            self.total_bytes += size
+            self.render()
+        return task
+
+    async def run_job(self, kind, path, size):
+        async with self.semaphore:
+            self.running += 1
+            self.render()
+            error = None
+            try:
+                loop = asyncio.get_running_loop()
+                if kind == 'clean':
+                    result = await loop.run_in_executor(self.executor, clean_log_file, path, None, False)
+                else:
+                    result = await loop.run_in_executor(self.executor, export_file, path, self.report_format)
+            except Exception as e:
+                result = None
+                error = str(e)
+            finally:
+                self.running -= 1
+
+        if kind == 'filter' and result is not None:
+            result, bad_lines, quarantine_path = result
+            if bad_lines:
+                self.quarantined.append((path, bad_lines, quarantine_path))
+
+        self.done[kind] += 1
+        self.done_bytes += size
+        if result is None:
+            self.failures.append((kind, path, error or 'no output produced'))
+        self.render()
+        return result
+
+    async def process_file(self, path, clean=True, export=True):
+        """
+        Clean a log file and export the cleaned file
+
+        Args:
+            path (str): Path to the raw log file
+            clean (bool): Run the clean job first
+            export (bool): Run the filter job on the (cleaned) file
+
+        Returns:
+            list: Paths of the last outputs produced, or None on failure
+        """
+        result = path
+        if clean:
+            result = await self.submit('clean', path)
+        if export and result:
+            return await self.submit('filter', result)
+        return [result] if result else None
+
+    async def run(self, paths, clean=True, export=True):
+        """
+        Process every file and wait for all jobs to finish
+
+        Args:
+            paths (list): Log files to process; a file given twice is processed once
+            clean (bool): Run clean jobs
+            export (bool): Run filter jobs
+
+        Returns:
+            list: Final output paths per distinct input file (None where a job failed)
+        """
+        paths = list(dict.fromkeys(os.path.abspath(path) for path in paths))
+        self.semaphore = asyncio.Semaphore(self.max_jobs)
+        with ProcessPoolExecutor(max_workers=self.max_jobs) as executor:
+            self.executor = executor
+            results = await asyncio.gather(*(self.process_file(path, clean, export) for path in paths))
+        print()
+        return results
+
+    def render(self):
+        """Redraw the combined progress line"""
+        parts = [f"{kind} {self.done[kind]}/{self.total[kind]}" for kind in JOB_KINDS if self.total[kind]]
+        elapsed = time.monotonic() - self.started
+        status = (f"[{' | '.join(parts)}] running: {self.running} | "
+                  f"{self.done_bytes / 1048576:.1f}/{self.total_bytes / 1048576:.1f} MB | {elapsed:.0f}s")
+        print('\r' + status.ljust(79), end='', flush=True)
+
+
+def main():
+    """Main function to handle command line arguments and drag & drop"""
+    parser = argparse.ArgumentParser(description='TRC Batch Runner - Clean and export many log files concurrently')
+    parser.add_argument('file', nargs='*', help='TRC log files to process (drag & drop supported)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Maximum number of jobs running at once (default: CPU count)')
+    parser.add_argument('--format', choices=['xlsx', 'csv', 'tsv'], default='xlsx',
+                        help='Report format for filter jobs (default: xlsx)')
+    parser.add_argument('--skip-clean', action='store_true', help='Files are already cleaned, only export them')
+    parser.add_argument('--clean-only', action='store_true', help='Only clean the files, do not export them')
+    args = parser.parse_args()
+
+    if not args.file:
+        print("TRC Batch Runner v1.0 - Drag & Drop Support")
+        print("=" * 50)
+        print("Usage: python trc_batch_runner.py [--jobs N] <input_file(s)>")
+        print("\nFeatures:")
+        print("  • Cleans and exports every dropped file")
+        print("  • Several files processed in parallel")
+        print("  • One combined progress display")
+        print("\nExamples:")
+        print("  python trc_batch_runner.py WorldSvr_01_01_250828.GameLog")
+        print("  python trc_batch_runner.py --jobs 4 --format csv file1.log file2.log file3.log")
+        print("\nDrag and drop files onto TRC_Batch_DragDrop.bat in Windows Explorer!")
+        sys.exit(1)
+
+    print("TRC Batch Runner v1.0")
+    print("=" * 30)
+    print(f"Processing {len(args.file)} file(s) with up to {args.jobs} job(s) at once...")
+    print()
+
+    runner = BatchRunner(max(1, args.jobs), args.format)
+    results = asyncio.run(runner.run(args.file, clean=not args.skip_clean, export=not args.clean_only))
+
+    # Summary
+    print()
+    print("=" * 30)
+    print("Processing Summary:")
+    print(f"  Total files: {len(results)}")
+    if len(args.file) > len(results):
+        print(f"  Duplicates ignored: {len(args.file) - len(results)}")
+    print(f"  Successful: {sum(1 for result in results if result)}")
+    print(f"  Failed jobs: {len(runner.failures)}")
+
+    if runner.failures:
+        print("\nFailed jobs:")
+        for kind, path, error in runner.failures:
+            print(f"  • {kind} {path}: {error}")
+
+    if runner.quarantined:
+        print("\n⚠️ Malformed lines quarantined:")
+        for path, bad_lines, quarantine_path in runner.quarantined:
+            print(f"  • {path}: {bad_lines} line(s), see {quarantine_path}")
+
+    outputs = [output for result in results if result for output in result]
+    if outputs:
+        print("\n🎉 Outputs ready:")
+        for output in outputs:
+            print(f"  • {output}")
+
+    sys.exit(0 if outputs else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,13 +29,14 @@ def clean_log_line(line):
     # Rejoin with pipe delimiter
     return '|'.join(cleaned_parts)
 
-def clean_log_file(input_file, output_file=None):
+def clean_log_file(input_file, output_file=None, verbose=True):
     r"""
     Clean a log file by removing \N entries from all lines
 
     Args:
         input_file (str): Path to input log file
         output_file (str, optional): Path to output file. If None, creates _cleaned suffix
+        verbose (bool, optional): Print progress and a summary. Errors are always printed
 
     Returns:
         str: Path to the cleaned output file
@@ -51,8 +52,9 @@ def clean_log_file(input_file, output_file=None):
 
     output_path = Path(output_file)
 
-    print(f"Cleaning log file: {input_file}")
-    print(f"Output will be saved to: {output_file}")
+    if verbose:
+        print(f"Cleaning log file: {input_file}")
+        print(f"Output will be saved to: {output_file}")
 
     total_lines = 0
     cleaned_lines = 0
@@ -73,16 +75,17 @@ def clean_log_file(input_file, output_file=None):
                     cleaned_lines += 1
 
                 # Progress indicator for large files
-                if line_num % 1000 == 0:
+                if verbose and line_num % 1000 == 0:
                     print(f"Processed {line_num} lines...")
 
     except Exception as e:
         print(f"Error processing file: {e}")
         return None
 
-    print(f"Processing complete!")
-    print(f"Total lines processed: {total_lines}")
-    print(f"Lines with data after cleaning: {cleaned_lines}")
+    if verbose:
+        print(f"Processing complete!")
+        print(f"Total lines processed: {total_lines}")
+        print(f"Lines with data after cleaning: {cleaned_lines}")
 
     return str(output_path)
 
@@ -112,6 +115,7 @@ def main():
 
     success_count = 0
     failed_files = []
+    result_files = []
 
     for i, input_file in enumerate(input_files, 1):
         print(f"[{i}/{len(input_files)}] Processing: {input_file}")
@@ -121,6 +125,7 @@ def main():
             if result_file:
                 print(f"  ✅ Success: {result_file}")
                 success_count += 1
+                result_files.append(result_file)
             else:
                 print("  ❌ Failed to clean file")
                 failed_files.append(input_file)
@@ -145,11 +150,11 @@ def main():
     if success_count > 0:
         print("\n🎉 All cleaned files are ready!")
         print("   You can now drag them onto TRC_Filter_Excel_3.py for Excel reports.")
-    if len(sys.argv) == 2 and success_count == 1:
+    if len(input_files) == 1 and success_count == 1:
         # If only one file was processed successfully, suggest next step
-        result_file = clean_log_file(sys.argv[1])
-        if result_file:
-            print(f"\n💡 Next: python TRC_Filter_Excel_3.py \"{result_file}\"")
+        print(f"\n💡 Next: python TRC_Filter_Excel_3.py \"{result_files[0]}\"")
+    elif len(input_files) > 1:
+        print("\n💡 Tip: trc_batch_runner.py cleans and exports many files in parallel.")
 
     sys.exit(0 if success_count > 0 else 1)
 
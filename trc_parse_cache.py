@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+TRC Parse Cache - Persistent per-file cache of extracted event rows
+
+Stores the rows TRC_Filter_Excel_3.py extracts from each log file in a
+compressed binary file, so re-running a report over already parsed
+GameLogs (e.g. one day alone, then the whole week) only parses new files.
+
+An entry is a sequence of frames: a 4-byte big-endian length followed by
+zlib-compressed JSON. Record frames hold a JSON array of up to
+CACHE_BLOCK_RECORDS records. The last frame is a JSON object with the
+record count and the entry's metadata, and the file ends with the 8-byte
+offset of that frame. Entries are written and read one frame at a time,
+so memory use does not grow with the size of the log file, and loading
+an entry never runs code from the cache directory.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import struct
+import zlib
+from pathlib import Path
+
+# Bump when the on-disk entry format changes
+CACHE_FORMAT = 2
+
+# Records per frame, written and read as one block
+CACHE_BLOCK_RECORDS = 10000
+
+FRAME_HEADER = struct.Struct('>I')
+TRAILER_OFFSET = struct.Struct('>Q')
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    Hash the contents of a file
+
+    Args:
+        path (str): Path to the file
+        chunk_size (int): Bytes read per chunk
+
+    Returns:
+        str: Hex digest of the file contents
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_file(path):
+    """Delete a file, ignoring it if it is already gone"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class CacheEntryError(Exception):
+    """A cache entry turned out to be corrupt while its records were being read"""
+
+
+def write_frame(outfile, value):
+    """Write one length-prefixed, compressed JSON frame"""
+    data = zlib.compress(json.dumps(value, separators=(',', ':')).encode('utf-8'), 1)
+    outfile.write(FRAME_HEADER.pack(len(data)))
+    outfile.write(data)
+
+
+def read_frame(infile):
+    """Read one frame written by write_frame()"""
+    header = infile.read(FRAME_HEADER.size)
+    if len(header) < FRAME_HEADER.size:
+        raise ValueError('truncated cache entry')
+    (size,) = FRAME_HEADER.unpack(header)
+    data = infile.read(size)
+    if len(data) < size:
+        raise ValueError('truncated cache entry')
+    return json.loads(zlib.decompress(data).decode('utf-8'))
+
+
+class CacheEntryWriter:
+    """
+    Writes one cache entry frame by frame
+
+    The entry is written to a temporary file and only replaces the real
+    entry on commit(), so a parse that stops halfway leaves no entry behind.
+    """
+
+    def __init__(self, cache, key):
+        """
+        Args:
+            cache (ParseCache): Cache the entry belongs to
+            key (str): Cache key from ParseCache.key_for()
+        """
+        self.cache = cache
+        self.entry_path = cache.cache_dir / f"{key}.bin"
+        self.temp_path = cache.cache_dir / f"{key}.tmp"
+        self.handle = open(self.temp_path, 'wb')
+        self.pending = []
+        self.records = 0
+
+    def add(self, record):
+        """
+        Add one record
+
+        Args:
+            record (list): JSON-serialisable record, e.g. a list of strings
+        """
+        self.pending.append(record)
+        if len(self.pending) >= CACHE_BLOCK_RECORDS:
+            self.write_block()
+
+    def write_block(self):
+        if self.pending:
+            write_frame(self.handle, self.pending)
+            self.records += len(self.pending)
+            self.pending.clear()
+
+    def commit(self, meta=None):
+        """
+        Finish the entry, make it visible and evict old entries past the disk budget
+
+        Args:
+            meta (object): JSON-serialisable data returned with the records by ParseCache.load()
+        """
+        self.write_block()
+        trailer_offset = self.handle.tell()
+        write_frame(self.handle, {'records': self.records, 'meta': meta})
+        self.handle.write(TRAILER_OFFSET.pack(trailer_offset))
+        self.handle.close()
+        os.replace(self.temp_path, self.entry_path)
+        self.cache.evict()
+
+    def discard(self):
+        """Drop the unfinished entry"""
+        self.handle.close()
+        remove_file(self.temp_path)
+
+
+class ParseCache:
+    """
+    Directory of cached parse results keyed by file size, mtime and content hash
+
+    Each entry holds one file's records as compressed JSON frames. The content
+    hash is remembered per path together with size and mtime, so unchanged
+    files are not re-hashed. Entries are evicted least recently used first
+    once the directory grows past max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes, variant=''):
+        """
+        Args:
+            cache_dir (str): Cache directory, created if missing
+            max_bytes (int): Disk budget for cached entries
+            variant (str): Parser settings the cached rows depend on
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.variant = variant
+        self.hits = 0
+        self.misses = 0
+
+        self.index_path = self.cache_dir / 'index.json'
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as infile:
+                self.index = json.load(infile)
+        except (OSError, ValueError):
+            self.index = {}
+        self.index_dirty = False
+
+    def key_for(self, path):
+        """
+        Build the cache key of a log file
+
+        Args:
+            path (str): Path to the log file
+
+        Returns:
+            str: Cache key, or None if the path is not a regular file
+        """
+        if not os.path.isfile(path):
+            return None
+
+        abs_path = os.path.abspath(path)
+        stat = os.stat(abs_path)
+        known = self.index.get(abs_path)
+        if known and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            digest = known[2]
+        else:
+            digest = file_digest(abs_path)
+            self.index[abs_path] = [stat.st_size, stat.st_mtime_ns, digest]
+            self.index_dirty = True
+
+        return f"{stat.st_size}-{digest}-f{CACHE_FORMAT}{self.variant}"
+
+    def load(self, key):
+        """
+        Open a cached entry
+
+        Only the entry's last frame is read here; the records are read one
+        frame at a time while the returned iterator is consumed.
+
+        Args:
+            key (str): Cache key from key_for()
+
+        Returns:
+            tuple: (metadata, iterator over the cached records), or None on a cache miss
+        """
+        entry_path = self.cache_dir / f"{key}.bin"
+        try:
+            with open(entry_path, 'rb') as infile:
+                infile.seek(-TRAILER_OFFSET.size, os.SEEK_END)
+                (trailer_offset,) = TRAILER_OFFSET.unpack(infile.read(TRAILER_OFFSET.size))
+                infile.seek(trailer_offset)
+                trailer = read_frame(infile)
+                meta, records = trailer['meta'], trailer['records']
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception as e:
+            logger.warning(f"Warning: Discarding unreadable cache entry {entry_path.name}: {e}")
+            remove_file(entry_path)
+            self.misses += 1
+            return None
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(entry_path)
+        self.hits += 1
+        return meta, self.iter_records(entry_path, trailer_offset, records)
+
+    def iter_records(self, entry_path, end, records):
+        """
+        Yield the records of an entry frame by frame
+
+        A frame that cannot be read, or a record count that does not match
+        the trailer, deletes the entry and raises CacheEntryError. Records
+        yielded before that point were valid.
+        """
+        count = 0
+        try:
+            with open(entry_path, 'rb') as infile:
+                while infile.tell() < end:
+                    block = read_frame(infile)
+                    yield from block
+                    count += len(block)
+        except (OSError, ValueError, TypeError, zlib.error) as e:
+            self.discard(entry_path, e)
+        if count != records:
+            self.discard(entry_path, f"{count} of {records} records found")
+
+    def discard(self, entry_path, reason):
+        """Delete a corrupt entry found while reading it, count it as a miss and raise CacheEntryError"""
+        remove_file(entry_path)
+        self.hits -= 1
+        self.misses += 1
+        raise CacheEntryError(f"Discarding corrupt cache entry {entry_path.name}: {reason}")
+
+    def writer(self, key):
+        """
+        Start writing the entry of a cache key
+
+        Args:
+            key (str): Cache key from key_for()
+
+        Returns:
+            CacheEntryWriter: Writer to add() records to, then commit() or discard()
+        """
+        return CacheEntryWriter(self, key)
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits max_bytes"""
+        entries = []
+        total = 0
+        for entry_path in self.cache_dir.glob('*.bin'):
+            stat = entry_path.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry_path))
+            total += stat.st_size
+
+        entries.sort()
+        for _mtime, size, entry_path in entries:
+            if total <= self.max_bytes:
+                break
+            remove_file(entry_path)
+            total -= size
+
+    def close(self):
+        """Persist the path -> content hash index"""
+        if not self.index_dirty:
+            return
+        temp_path = self.index_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as outfile:
+            json.dump(self.index, outfile)
+        os.replace(temp_path, self.index_path)
+        self.index_dirty = False
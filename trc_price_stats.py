@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+TRC Price Stats - Streaming price anomaly scoring
+
+Keeps a small quantile sketch of sale prices per item (ItemKind+ItemOpt)
+and scores every auction house / personal shop sale by how far its unit
+price lies from the item's market price seen so far. Only the highest
+scoring sales are kept, so memory stays bounded however large the logs.
+"""
+
+import heapq
+import math
+from collections import OrderedDict
+
+# Relative accuracy of the sketch quantiles (2%)
+SKETCH_ACCURACY = 0.02
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+SKETCH_LOG_GAMMA = math.log(SKETCH_GAMMA)
+# Bins kept per item; the lowest bins are merged beyond this
+SKETCH_MAX_BINS = 128
+
+# A price spread below this (in log units, about 5%) is treated as 5%, so
+# items that always sell at one fixed price still get finite scores
+MIN_LOG_SPREAD = 0.05
+
+
+class PriceSketch:
+    """
+    Log-bucketed quantile sketch of prices
+
+    Prices are counted in buckets whose bounds grow by SKETCH_GAMMA, so any
+    quantile is returned within SKETCH_ACCURACY of the true value while the
+    sketch never holds more than SKETCH_MAX_BINS counters.
+    """
+
+    __slots__ = ('bins', 'count')
+
+    def __init__(self):
+        self.bins = {}
+        self.count = 0
+
+    def add(self, price):
+        key = math.ceil(math.log(price) / SKETCH_LOG_GAMMA)
+        self.bins[key] = self.bins.get(key, 0) + 1
+        self.count += 1
+        if len(self.bins) > SKETCH_MAX_BINS:
+            lowest, second = sorted(self.bins)[:2]
+            self.bins[second] += self.bins.pop(lowest)
+
+    def log_quantiles(self, quantiles):
+        """
+        Estimate quantiles in log-price space
+
+        Args:
+            quantiles (list): Ascending quantiles between 0 and 1
+
+        Returns:
+            list: Natural log of the price at each quantile
+        """
+        results = []
+        keys = sorted(self.bins)
+        index = 0
+        seen = self.bins[keys[0]]
+        for q in quantiles:
+            rank = q * (self.count - 1)
+            while seen <= rank and index < len(keys) - 1:
+                index += 1
+                seen += self.bins[keys[index]]
+            # Bucket midpoint: 2 * gamma^k / (gamma + 1)
+            results.append(keys[index] * SKETCH_LOG_GAMMA - math.log((SKETCH_GAMMA + 1) / 2))
+        return results
+
+
+class PriceAnomalyScorer:
+    """
+    Scores sales against per-item price sketches and keeps the top anomalies
+
+    Each sale is scored against the prices seen before it, then added to
+    its item's sketch. The score is a robust z-score in log space:
+    |log(price) - log(median)| divided by the interquartile spread. Only
+    sales scoring at least min_score are anomaly candidates.
+    """
+
+    def __init__(self, min_samples=20, top_n=1000, max_items=50000, min_score=3.0):
+        """
+        Args:
+            min_samples (int): Sales of an item seen before its sales are scored
+            top_n (int): Number of highest scoring sales kept
+            min_score (float): Lowest score kept as an anomaly
+            max_items (int): Items with a sketch; the least recently sold are dropped
+        """
+        self.min_samples = min_samples
+        self.top_n = top_n
+        self.max_items = max_items
+        self.min_score = min_score
+        self.sketches = OrderedDict()
+        self.top = []
+        self.sales = 0
+        self.scored = 0
+
+    def add(self, item_key, unit_price, sale):
+        """
+        Score one sale and add its price to the item's sketch
+
+        Args:
+            item_key (tuple): Item identity, e.g. (ItemKind, ItemOpt)
+            unit_price (int): Price of one unit
+            sale (list): Report columns describing the sale, kept for the anomaly row
+        """
+        if unit_price <= 0:
+            return
+        self.sales += 1
+
+        sketch = self.sketches.get(item_key)
+        if sketch is None:
+            sketch = self.sketches[item_key] = PriceSketch()
+            if len(self.sketches) > self.max_items:
+                self.sketches.popitem(last=False)
+        else:
+            self.sketches.move_to_end(item_key)
+
+        if sketch.count >= self.min_samples:
+            log_q1, log_median, log_q3 = sketch.log_quantiles([0.25, 0.5, 0.75])
+            spread = max((log_q3 - log_q1) / 1.349, MIN_LOG_SPREAD)
+            deviation = math.log(unit_price) - log_median
+            score = abs(deviation) / spread
+            self.scored += 1
+
+            if score >= self.min_score:
+                entry = (score, self.scored, deviation, math.exp(log_median), sketch.count, sale)
+                if len(self.top) < self.top_n:
+                    heapq.heappush(self.top, entry)
+                elif self.top and score > self.top[0][0]:
+                    heapq.heapreplace(self.top, entry)
+
+        sketch.add(unit_price)
+
+    def rows(self):
+        """
+        Ranked anomaly rows, highest score first
+
+        Returns:
+            list: [Score, Direction, MarketPrice, Samples] + sale columns per anomaly
+        """
+        rows = []
+        for score, _seq, deviation, median, samples, sale in sorted(self.top, reverse=True):
+            if deviation > 0:
+                direction = 'Above'
+            elif deviation < 0:
+                direction = 'Below'
+            else:
+                direction = '-'
+            rows.append([f"{score:.2f}", direction, str(round(median)), str(samples)] + sale)
+        return rows
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+TRC Timeline - Per-character sessions and activity timelines
+
+Rebuilds login sessions from channel entry (9103) and disconnect (9)
+events and attaches every trade, mail, shop, auction, warehouse, throw and
+dungeon event to the session of each character involved. The result is an
+indexed SQLite database, so "what did this character do during this
+login" is a lookup instead of a rescan of the logs.
+
+Sessions are paired on the connection address field (third log field):
+a 9103 opens a session for its character on that address, and the next 9
+for the same address closes it. A new 9103 for a character that still has
+an open session (channel change) closes the old session first.
+"""
+
+import os
+import sqlite3
+import sys
+from datetime import datetime
+
+# Rows buffered before each executemany() call
+INSERT_BATCH_ROWS = 10000
+
+SCHEMA = """
+CREATE TABLE sessions (
+    session_id INTEGER PRIMARY KEY,
+    char_idx TEXT NOT NULL,
+    address TEXT,
+    login_ts INTEGER NOT NULL,
+    logout_ts INTEGER,
+    event_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE events (
+    char_idx TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    event_id TEXT NOT NULL,
+    sheet TEXT NOT NULL,
+    counterparty TEXT,
+    detail TEXT,
+    session_id INTEGER
+);
+"""
+
+INDEXES = """
+CREATE INDEX sessions_by_char ON sessions (char_idx, login_ts);
+CREATE INDEX events_by_char ON events (char_idx, ts);
+CREATE INDEX events_by_session ON events (session_id, ts);
+CREATE VIEW session_events AS
+    SELECT s.char_idx, s.session_id, s.address, s.login_ts, s.logout_ts,
+           e.ts, e.event_id, e.sheet, e.counterparty, e.detail
+    FROM events e JOIN sessions s ON s.session_id = e.session_id;
+"""
+
+
+class TimelineBuilder:
+    """
+    Streams events into a timeline database and reconstructs sessions on close
+
+    Activity events are inserted as they arrive. Connection events are
+    small in number, so they are kept in memory and paired into sessions
+    once all files have been read, which also makes the result independent
+    of the order in which files were given.
+    """
+
+    def __init__(self, db_path, participant_columns):
+        """
+        Args:
+            db_path (str): Database file to create (replaced if it exists)
+            participant_columns (dict): Sheet name -> row columns holding character ids
+        """
+        self.db_path = str(db_path)
+        self.participant_columns = participant_columns
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute('PRAGMA journal_mode = OFF')
+        self.db.execute('PRAGMA synchronous = OFF')
+        self.db.executescript(SCHEMA)
+
+        self.pending = []
+        self.connections = []
+        self.event_count = 0
+        self.session_count = 0
+
+    def add(self, sheet_name, event_id, timestamp, address, row):
+        """
+        Add one parsed event
+
+        Args:
+            sheet_name (str): Report sheet the event belongs to
+            event_id (str): Log event type, e.g. '5131'
+            timestamp (str): Unix timestamp field of the log line
+            address (str): Connection address field of the log line
+            row (list): Report row of the event
+        """
+        # Skip timestamps SQLite cannot store or print_timeline() cannot show
+        try:
+            ts = int(timestamp)
+            datetime.fromtimestamp(ts)
+        except (ValueError, OverflowError, OSError):
+            return
+
+        if event_id == '9103':
+            self.connections.append((ts, 1, row[1], address))
+            return
+        if event_id == '9':
+            self.connections.append((ts, 0, None, address))
+            return
+
+        columns = self.participant_columns[sheet_name]
+        detail = '|'.join(row)
+        for col in columns:
+            char_idx = row[col]
+            if not char_idx or char_idx == '-':
+                continue
+            counterparty = None
+            for other in columns:
+                if other != col:
+                    counterparty = row[other]
+            self.pending.append((char_idx, ts, event_id, sheet_name, counterparty, detail))
+
+        if len(self.pending) >= INSERT_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        self.db.executemany('INSERT INTO events (char_idx, ts, event_id, sheet, counterparty, detail) '
+                            'VALUES (?, ?, ?, ?, ?, ?)', self.pending)
+        self.event_count += len(self.pending)
+        self.pending.clear()
+
+    def build_sessions(self):
+        """Pair 9103/9 events into sessions"""
+        sessions = []
+        open_by_char = {}
+        open_by_address = {}
+
+        # Disconnects sort before entries at the same second
+        for ts, is_entry, char_idx, address in sorted(self.connections, key=lambda c: (c[0], c[1])):
+            if is_entry:
+                previous = open_by_char.pop(char_idx, None)
+                if previous is not None:
+                    previous[3] = ts
+                    open_by_address.get(previous[1], {}).pop(char_idx, None)
+                session = [char_idx, address, ts, None]
+                sessions.append(session)
+                open_by_char[char_idx] = session
+                open_by_address.setdefault(address, {})[char_idx] = session
+            else:
+                for char_idx, session in open_by_address.pop(address, {}).items():
+                    session[3] = ts
+                    open_by_char.pop(char_idx, None)
+
+        self.db.executemany('INSERT INTO sessions (char_idx, address, login_ts, logout_ts) VALUES (?, ?, ?, ?)',
+                            sessions)
+        self.session_count = len(sessions)
+
+    def close(self):
+        """Write the remaining events, build sessions and indexes, and close the database"""
+        self.flush()
+        self.build_sessions()
+        self.db.executescript(INDEXES)
+        self.db.execute("""
+            UPDATE events SET session_id = (
+                SELECT s.session_id FROM sessions s
+                WHERE s.char_idx = events.char_idx AND s.login_ts <= events.ts
+                  AND (s.logout_ts IS NULL OR events.ts <= s.logout_ts)
+                ORDER BY s.login_ts DESC LIMIT 1)
+        """)
+        self.db.execute("""
+            UPDATE sessions SET event_count = (
+                SELECT COUNT(*) FROM events WHERE events.session_id = sessions.session_id)
+        """)
+        self.db.commit()
+        self.db.close()
+
+
+def format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S') if ts is not None else 'still online'
+
+
+def print_timeline(db_path, char_idx):
+    """
+    Print the sessions and activity of one character
+
+    Args:
+        db_path (str): Timeline database written by TRC_Filter_Excel_3.py --timeline
+        char_idx (str): Character id to look up
+    """
+    db = sqlite3.connect(db_path)
+    sessions = db.execute('SELECT session_id, address, login_ts, logout_ts, event_count FROM sessions '
+                          'WHERE char_idx = ? ORDER BY login_ts', (char_idx,)).fetchall()
+    print(f"CharIDX {char_idx}: {len(sessions)} session(s)")
+
+    for session_id, address, login_ts, logout_ts, event_count in sessions:
+        print()
+        print(f"Session {session_id} from {address}: {format_ts(login_ts)} -> {format_ts(logout_ts)} "
+              f"({event_count} event(s))")
+        for ts, event_id, sheet, counterparty, detail in db.execute(
+                'SELECT ts, event_id, sheet, counterparty, detail FROM events '
+                'WHERE session_id = ? AND char_idx = ? ORDER BY ts', (session_id, char_idx)):
+            with_text = f" with {counterparty}" if counterparty else ""
+            print(f"  {format_ts(ts)}  {event_id:>5} {sheet}{with_text}: {detail}")
+
+    unattached = db.execute('SELECT COUNT(*) FROM events WHERE char_idx = ? AND session_id IS NULL',
+                            (char_idx,)).fetchone()[0]
+    if unattached:
+        print()
+        print(f"{unattached} event(s) outside any known session")
+    db.close()
+
+
+def main():
+    """Main function to look up a character in a timeline database"""
+    if len(sys.argv) != 3:
+        print("TRC Timeline v1.0")
+        print("=" * 50)
+        print("Usage: python trc_timeline.py <timeline.db> <CharIDX>")
+        print("\nCreate the database with:")
+        print("  python TRC_Filter_Excel_3.py --timeline <log_file(s)>")
+        sys.exit(1)
+
+    print_timeline(sys.argv[1], sys.argv[2])
+
+
+if __name__ == "__main__":
+    main()